@@ -3,29 +3,114 @@ import { NextRequest, NextResponse } from 'next/server';
 
 export const runtime = 'nodejs';
 
-const PY_BACKEND_ANALYZE_URL = 'http://localhost:8000/analyze';
+// Comma-separated list of Python backends, e.g. "http://10.0.0.5:8000,http://10.0.0.6:8000"
+const PY_BACKEND_URLS = (process.env.PY_BACKEND_URLS || 'http://localhost:8000')
+  .split(',')
+  .map((u) => u.trim().replace(/\/+$/, ''))
+  .filter(Boolean);
+
+const PY_BACKEND_TIMEOUT_MS = Number(process.env.PY_BACKEND_TIMEOUT_MS || 120_000);
+const UPSTREAM_COOLDOWN_MS = Number(process.env.PY_BACKEND_COOLDOWN_MS || 10_000);
+// Headers that describe the body (plus the backend's result markers); everything else is hop-by-hop or irrelevant.
+// Headers that describe the body itself; everything else is hop-by-hop or irrelevant.
+// X-Document-Id is handled separately because it also carries the upstream to pin to.
+const FORWARDED_REQUEST_HEADERS = ['content-type', 'content-length'];
+const FORWARDED_RESPONSE_HEADERS = ['content-type', 'content-length', 'x-near-duplicate-similarity'];
+
+let nextUpstream = 0;
+const downUntil = new Map<string, number>();
+
+// Round-robin over the upstreams, skipping any that failed within the cooldown window.
+// Returns an index into PY_BACKEND_URLS.
+function pickUpstream(): number {
+  const now = Date.now();
+  for (let i = 0; i < PY_BACKEND_URLS.length; i++) {
+    const index = (nextUpstream + i) % PY_BACKEND_URLS.length;
+    if ((downUntil.get(PY_BACKEND_URLS[index]) || 0) <= now) {
+      nextUpstream = (index + 1) % PY_BACKEND_URLS.length;
+      return index;
+    }
+  }
+  // Everything is cooling down: fall back to plain round-robin rather than failing outright.
+  const index = nextUpstream;
+  nextUpstream = (nextUpstream + 1) % PY_BACKEND_URLS.length;
+  return index;
+}
+
+// Document ids live in one backend's memory, so the id handed to the client is
+// "<upstream index>.<backend id>" and follow-ups are routed back to that upstream.
+function pinnedDocument(header: string | null): { upstream: number; id: string } | null {
+  const match = /^(\d+)\.(\w+)$/.exec(header || '');
+  if (!match) return null;
+  const upstream = Number(match[1]);
+  return upstream < PY_BACKEND_URLS.length ? { upstream, id: match[2] } : null;
+}
+
+function unknownDocument() {
+  // Same answer the backend gives for an expired id, so the client re-uploads.
+  return NextResponse.json({ detail: 'Unknown or expired documentId.' }, { status: 404 });
+}
+
+function pickHeaders(source: Headers, names: string[]): Headers {
+  const out = new Headers();
+  for (const name of names) {
+    const value = source.get(name);
+    if (value) out.set(name, value);
+  }
+  return out;
+}
 
 export async function POST(req: NextRequest) {
-  try {
-    const incoming = await req.formData();
+  const documentHeader = req.headers.get('x-document-id');
+  const pinned = pinnedDocument(documentHeader);
+  if (documentHeader && !pinned) return unknownDocument();
+
+  const upstreamIndex = pinned ? pinned.upstream : pickUpstream();
+  const upstream = PY_BACKEND_URLS[upstreamIndex];
+  if (pinned && (downUntil.get(upstream) || 0) > Date.now()) return unknownDocument();
 
-    const res = await fetch(PY_BACKEND_ANALYZE_URL, {
+  const requestHeaders = pickHeaders(req.headers, FORWARDED_REQUEST_HEADERS);
+  if (pinned) requestHeaders.set('x-document-id', pinned.id);
+
+  const timeout = AbortSignal.timeout(PY_BACKEND_TIMEOUT_MS);
+  const signal = AbortSignal.any([req.signal, timeout]);
+
+  try {
+    // Stream the multipart body straight through. Node's built-in fetch keeps a
+    // keep-alive connection pool per origin, so repeated calls reuse sockets.
+    const res = await fetch(`${upstream}/analyze`, {
       method: 'POST',
-      body: incoming,
-    });
+      headers: requestHeaders,
+      body: req.body,
+      signal,
+      // Required by Node's fetch when the body is a stream.
+      duplex: 'half',
+    } as RequestInit & { duplex: 'half' });
 
-    const text = await res.text();
+    // Pass through status + body (JSON expected) without buffering it here.
+    const headers = pickHeaders(res.headers, FORWARDED_RESPONSE_HEADERS);
+    if (!headers.has('content-type')) headers.set('content-type', 'application/json');
+    const documentId = res.headers.get('x-document-id');
+    if (documentId) headers.set('x-document-id', `${upstreamIndex}.${documentId}`);
 
-    // Pass through status + body (JSON expected)
-    return new NextResponse(text, {
-      status: res.status,
-      headers: { 'Content-Type': res.headers.get('content-type') || 'application/json' },
-    });
+    return new NextResponse(res.body, { status: res.status, headers });
   } catch (err: any) {
-    console.error('Proxy error in /api/analyze:', err);
+    if (req.signal.aborted) {
+      // Client went away; nobody is listening for this response.
+      return new NextResponse(null, { status: 499 });
+    }
+    if (timeout.aborted) {
+      return NextResponse.json(
+        { error: `Python backend did not respond within ${PY_BACKEND_TIMEOUT_MS} ms.` },
+        { status: 504 }
+      );
+    }
+
+    downUntil.set(upstream, Date.now() + UPSTREAM_COOLDOWN_MS);
+    console.error(`Proxy error in /api/analyze (${upstream}):`, err);
     return NextResponse.json(
       { error: err?.message || 'Failed to reach Python backend.' },
-      { status: 500 }
+      { status: 502 }
     );
   }
 }
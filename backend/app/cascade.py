@@ -0,0 +1,158 @@
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar, Union
+
+
+T = TypeVar("T")
+
+
+class LowConfidence(ValueError):
+    pass
+
+
+@dataclass
+class Tier:
+    name: str
+    # Batch of prompts -> batch of raw model outputs, same order.
+    generate: Callable[[List[str], int], List[str]]
+
+
+@dataclass
+class TierStats:
+    attempts: int = 0
+    accepted: int = 0
+    escalated: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    # Unconditional runs on a random sample of prompts, for an unbiased per-prompt cost.
+    baseline_prompts: int = 0
+    baseline_seconds: float = 0.0
+
+    @property
+    def seconds_per_prompt(self) -> float:
+        return self.seconds / self.attempts if self.attempts else 0.0
+
+
+@dataclass
+class GenerationCascade(Generic[T]):
+    """
+    Tries each tier in order and only escalates the prompts whose output fails
+    `parse` (validation) or `accept` (confidence). The last tier's output is
+    returned as-is, so the cascade never does worse than running it alone.
+
+    Escalated prompts are the hard ones, so their cost on the last tier says
+    little about an average prompt. The savings estimate uses
+    `final_seconds_estimate` when configured. Otherwise callers off the request
+    path (the batch CLI) can pass `baseline_sample_rate` to run_batch to also
+    run a random share of prompts on the last tier and time them.
+    """
+
+    tiers: List[Tier]
+    parse: Callable[[str], T]
+    accept: Callable[[T], bool]
+    stats: Dict[str, TierStats] = field(default_factory=dict)
+    final_seconds_estimate: Optional[float] = None
+    rng: random.Random = field(default_factory=random.Random)
+
+    def __post_init__(self) -> None:
+        for tier in self.tiers:
+            self.stats.setdefault(tier.name, TierStats())
+
+    def run(self, prompt: str) -> T:
+        result = self.run_batch([prompt])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def run_batch(
+        self,
+        prompts: List[str],
+        batch_size: int = 1,
+        baseline_sample_rate: float = 0.0,
+    ) -> List[Union[T, Exception]]:
+        results: List[Optional[Union[T, Exception]]] = [None] * len(prompts)
+        pending = list(range(len(prompts)))
+
+        for position, tier in enumerate(self.tiers):
+            last = position == len(self.tiers) - 1
+            stats = self.stats[tier.name]
+
+            started = time.perf_counter()
+            outputs = tier.generate([prompts[i] for i in pending], batch_size)
+            stats.seconds += time.perf_counter() - started
+            stats.attempts += len(pending)
+
+            escalate: List[int] = []
+            for i, text in zip(pending, outputs):
+                try:
+                    parsed = self.parse(text)
+                    if not last and not self.accept(parsed):
+                        raise LowConfidence(f"{tier.name} output failed the confidence check.")
+                    results[i] = parsed
+                    stats.accepted += 1
+                except Exception as e:
+                    results[i] = e
+                    if last:
+                        stats.failed += 1
+                    else:
+                        stats.escalated += 1
+                        escalate.append(i)
+
+            pending = escalate
+            if not pending:
+                break
+
+        self._sample_baseline(prompts, batch_size, baseline_sample_rate)
+        return results  # type: ignore[return-value]
+
+    def _sample_baseline(self, prompts: List[str], batch_size: int, rate: float) -> None:
+        if len(self.tiers) < 2 or self.final_seconds_estimate is not None or rate <= 0:
+            return
+        sample = [p for p in prompts if self.rng.random() < rate]
+        if not sample:
+            return
+
+        final = self.tiers[-1]
+        started = time.perf_counter()
+        final.generate(sample, batch_size)
+        stats = self.stats[final.name]
+        stats.baseline_seconds += time.perf_counter() - started
+        stats.baseline_prompts += len(sample)
+
+    def final_seconds_per_prompt(self) -> Tuple[Optional[float], Optional[str]]:
+        if self.final_seconds_estimate is not None:
+            return self.final_seconds_estimate, "configured"
+        final = self.stats[self.tiers[-1].name]
+        if final.baseline_prompts:
+            return final.baseline_seconds / final.baseline_prompts, "sampled"
+        return None, None
+
+    def report(self) -> Dict[str, Any]:
+        final_cost, source = self.final_seconds_per_prompt()
+        tiers = []
+        for tier in self.tiers:
+            s = self.stats[tier.name]
+            entry: Dict[str, Any] = {
+                "tier": tier.name,
+                "attempts": s.attempts,
+                "accepted": s.accepted,
+                "escalated": s.escalated,
+                "failed": s.failed,
+                "escalationRate": s.escalated / s.attempts if s.attempts else 0.0,
+                "avgLatencyMs": s.seconds_per_prompt * 1000,
+            }
+            if tier is not self.tiers[-1]:
+                # Net estimate: what accepted prompts would have cost on the final
+                # tier, minus everything spent on this tier (escalated prompts included).
+                entry["latencySavedMs"] = (
+                    (s.accepted * final_cost - s.seconds) * 1000 if final_cost is not None else None
+                )
+            else:
+                entry["baselinePrompts"] = s.baseline_prompts
+            tiers.append(entry)
+        return {
+            "tiers": tiers,
+            "finalLatencyEstimateMs": final_cost * 1000 if final_cost is not None else None,
+            "finalLatencyEstimateSource": source,
+        }
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import tempfile
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .near_dup import normalize_text
+
+
+COHORT_INDEX_DIR = os.getenv("COHORT_INDEX_DIR", "")
+
+
+def write_atomic(path: str, data: str) -> None:
+    # Write a sibling temp file and rename it over the target, so a crash
+    # leaves either the old file or the new one, never a truncated mix.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+@dataclass
+class Candidate:
+    id: str
+    name: str
+    role: str
+    text: str
+    # sha256 of the normalized text; the same resume is stored once per role.
+    digest: str = ""
+
+
+class CohortIndex:
+    """
+    On-disk embedding index of resumes for cohort ranking.
+
+    Layout of `directory`:
+      vectors.f32      - append-only float32 rows (L2-normalized), memory-mapped for queries
+      candidates.jsonl - one Candidate per row, same order as vectors.f32
+      roles.json       - role description + embedding, keyed by normalized role
+      index.json       - {"dim": d}
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._candidates_path = os.path.join(directory, "candidates.jsonl")
+        self._roles_path = os.path.join(directory, "roles.json")
+        self._info_path = os.path.join(directory, "index.json")
+
+        self.dim: Optional[int] = None
+        if os.path.exists(self._info_path):
+            with open(self._info_path) as f:
+                self.dim = json.load(f)["dim"]
+
+        self._candidates: List[Candidate] = self._load_candidates()
+        self._recover_vectors()
+
+        self._roles: Dict[str, Dict] = {}
+        if os.path.exists(self._roles_path):
+            with open(self._roles_path) as f:
+                self._roles = json.load(f)
+
+        self._role_rows: Dict[str, List[int]] = {}
+        self._by_digest: Dict[Tuple[str, str], str] = {}
+        for row, c in enumerate(self._candidates):
+            self._role_rows.setdefault(c.role, []).append(row)
+            self._by_digest[(c.role, c.digest or self.text_digest(c.text))] = c.id
+        self._matrix: Optional[np.ndarray] = None
+
+    def _load_candidates(self) -> List[Candidate]:
+        if not os.path.exists(self._candidates_path):
+            return []
+        with open(self._candidates_path, "rb") as f:
+            data = f.read()
+
+        # A crash mid-append can leave a torn last line; cut it off so the
+        # next append starts on a fresh line.
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            with open(self._candidates_path, "r+b") as f:
+                f.truncate(complete)
+        return [Candidate(**json.loads(line)) for line in data[:complete].splitlines() if line.strip()]
+
+    def _recover_vectors(self) -> None:
+        # add() writes vectors before metadata, so after a crash between the two
+        # vectors.f32 has extra rows. Drop them, or every later row would be
+        # attached to the wrong candidate.
+        if self.dim is None or not os.path.exists(self._vectors_path):
+            return
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        size = os.path.getsize(self._vectors_path)
+        expected = len(self._candidates) * row_bytes
+        if size > expected:
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(expected)
+        elif size < expected:
+            # Metadata without vectors should not happen; keep only rows that have both.
+            self._candidates = self._candidates[: size // row_bytes]
+            with open(self._vectors_path, "r+b") as f:
+                f.truncate(len(self._candidates) * row_bytes)
+            write_atomic(self._candidates_path, "".join(json.dumps(asdict(c)) + "\n" for c in self._candidates))
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    @staticmethod
+    def role_key(role: str) -> str:
+        return normalize_text(role)
+
+    @staticmethod
+    def text_digest(text: str) -> str:
+        return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+    def _ensure_dim(self, dim: int) -> None:
+        if self.dim is None:
+            self.dim = dim
+            write_atomic(self._info_path, json.dumps({"dim": dim}))
+        elif self.dim != dim:
+            raise ValueError(f"Embedding dim {dim} does not match index dim {self.dim}.")
+
+    def _vectors(self) -> np.ndarray:
+        # Re-mapped lazily after appends; rows written before the map was opened stay valid.
+        if self._matrix is None or self._matrix.shape[0] != len(self._candidates):
+            if not self._candidates:
+                return np.zeros((0, self.dim or 0), dtype=np.float32)
+            self._matrix = np.memmap(
+                self._vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self._candidates), self.dim),
+            )
+        return self._matrix
+
+    def add(self, names: List[str], roles: List[str], texts: List[str], vectors: np.ndarray) -> List[str]:
+        if not (len(names) == len(roles) == len(texts) == vectors.shape[0]):
+            raise ValueError("names, roles, texts and vectors must have the same length.")
+        if vectors.shape[0] == 0:
+            return []
+        self._ensure_dim(vectors.shape[1])
+
+        # Resumes already in the index for that role keep their existing id and row.
+        ids: List[str] = []
+        added: List[Candidate] = []
+        keep: List[int] = []
+        for i, (name, role, text) in enumerate(zip(names, roles, texts)):
+            key = (self.role_key(role), self.text_digest(text))
+            existing = self._by_digest.get(key)
+            if existing is None:
+                c = Candidate(id=uuid.uuid4().hex, name=name, role=key[0], text=text, digest=key[1])
+                self._by_digest[key] = c.id
+                added.append(c)
+                keep.append(i)
+                existing = c.id
+            ids.append(existing)
+        if not added:
+            return ids
+        vectors = vectors[keep]
+
+        with open(self._vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(self._candidates_path, "a") as f:
+            for c in added:
+                f.write(json.dumps(asdict(c)) + "\n")
+
+        for c in added:
+            self._role_rows.setdefault(c.role, []).append(len(self._candidates))
+            self._candidates.append(c)
+        return ids
+
+    def set_role(self, role: str, description: str, vector: np.ndarray) -> None:
+        self._ensure_dim(int(vector.shape[-1]))
+        self._roles[self.role_key(role)] = {
+            "description": description,
+            "vector": np.asarray(vector, dtype=np.float32).reshape(-1).tolist(),
+        }
+        write_atomic(self._roles_path, json.dumps(self._roles))
+
+    def role_vector(self, role: str) -> Optional[np.ndarray]:
+        entry = self._roles.get(self.role_key(role))
+        if entry is None:
+            return None
+        return np.asarray(entry["vector"], dtype=np.float32)
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        role: Optional[str] = None,
+    ) -> List[List[Tuple[Candidate, float]]]:
+        """Batched cosine top-k; `queries` is (m, dim) and already normalized."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if role is None:
+            rows = np.arange(len(self._candidates))
+        else:
+            rows = np.asarray(self._role_rows.get(self.role_key(role), []), dtype=np.int64)
+        if rows.size == 0 or k <= 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        matrix = self._vectors()
+        if rows.size != matrix.shape[0]:
+            matrix = matrix[rows]
+        scores = matrix @ queries.T  # (n, m)
+        k = min(k, rows.size)
+
+        results = []
+        for col in range(scores.shape[1]):
+            column = scores[:, col]
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top])]
+            results.append([(self._candidates[rows[i]], float(column[i])) for i in top])
+        return results
+
+    def rank_cohort(self, role: str, k: int, query: Optional[np.ndarray] = None) -> List[Tuple[Candidate, float]]:
+        if query is None:
+            query = self.role_vector(role)
+        if query is None:
+            raise KeyError(f"No description stored for role: {role}")
+        return self.search(query, k, role=role)[0]
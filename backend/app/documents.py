@@ -0,0 +1,95 @@
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DOCUMENT_STORE_MAX = int(os.getenv("DOCUMENT_STORE_MAX", "1000"))
+DOCUMENT_TTL_SECONDS = int(os.getenv("DOCUMENT_TTL_SECONDS", "3600"))
+
+# Line-level headings that start a new resume section.
+SECTION_HEADINGS = [
+    "professional summary",
+    "summary",
+    "objective",
+    "experience",
+    "work experience",
+    "education",
+    "skills",
+    "projects",
+    "internship",
+    "internships",
+    "certification",
+    "certifications",
+    "achievements",
+]
+
+
+def split_sections(text: str) -> Dict[str, str]:
+    sections: Dict[str, List[str]] = {}
+    current = "header"
+    for line in (text or "").splitlines():
+        heading = re.sub(r"\s+", " ", line).strip().rstrip(":").lower()
+        if heading in SECTION_HEADINGS:
+            current = heading
+            sections.setdefault(current, [])
+            continue
+        sections.setdefault(current, []).append(line)
+    return {name: "\n".join(lines).strip() for name, lines in sections.items()}
+
+
+@dataclass
+class DocumentArtifacts:
+    id: str
+    text: str
+    # (is_resume, hits, matched, reason) as returned by looks_like_resume()
+    guard: Tuple[bool, int, List[str], str]
+    sections: Dict[str, str]
+    # Resume portion of the prompt, built once and reused for every follow-up.
+    resume_block: str
+    # Assessments already produced for this document, keyed by questionnaire digest.
+    results: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+
+
+class DocumentStore:
+    """In-memory LRU of per-document artifacts with a TTL."""
+
+    def __init__(self, max_entries: int = DOCUMENT_STORE_MAX, ttl_seconds: int = DOCUMENT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._docs: "OrderedDict[str, DocumentArtifacts]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def put(
+        self,
+        text: str,
+        guard: Tuple[bool, int, List[str], str],
+        resume_block: str,
+    ) -> DocumentArtifacts:
+        doc = DocumentArtifacts(
+            id=uuid.uuid4().hex,
+            text=text,
+            guard=guard,
+            sections=split_sections(text),
+            resume_block=resume_block,
+        )
+        self._docs[doc.id] = doc
+        while len(self._docs) > self.max_entries:
+            self._docs.popitem(last=False)
+        return doc
+
+    def get(self, doc_id: str) -> Optional[DocumentArtifacts]:
+        doc = self._docs.get(doc_id)
+        if doc is None:
+            return None
+        if time.time() - doc.created_at > self.ttl_seconds:
+            del self._docs[doc_id]
+            return None
+        self._docs.move_to_end(doc_id)
+        return doc
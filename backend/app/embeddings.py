@@ -0,0 +1,49 @@
+import os
+from typing import List, Tuple
+
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+
+EMBED_MODEL_ID = os.getenv("EMBED_MODEL_ID", "sentence-transformers/all-MiniLM-L6-v2")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "16"))
+
+_tokenizer = None
+_model = None
+
+
+def get_embedder() -> Tuple[AutoTokenizer, AutoModel]:
+    global _tokenizer, _model
+    if _model is None:
+        _tokenizer = AutoTokenizer.from_pretrained(EMBED_MODEL_ID)
+        _model = AutoModel.from_pretrained(EMBED_MODEL_ID).eval()
+    return _tokenizer, _model
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Mean-pooled, L2-normalized embeddings, one float32 row per text."""
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    tokenizer, model = get_embedder()
+    rows = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = tokenizer(
+            texts[start : start + EMBED_BATCH_SIZE],
+            padding=True,
+            truncation=True,
+            return_tensors="pt",
+        )
+        with torch.no_grad():
+            hidden = model(**batch).last_hidden_state
+
+        # Pool over real tokens only, so a text embeds the same whether it is
+        # alone or padded out to the longest text in its batch.
+        mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        rows.append(pooled.float().cpu().numpy())
+
+    matrix = np.vstack(rows).astype(np.float32, copy=False)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "true").lower() == "true"
+NEAR_DUP_SIMILARITY = float(os.getenv("NEAR_DUP_SIMILARITY", "0.95"))
+# Each entry holds a full result dict in every worker, so keep this modest.
+NEAR_DUP_MAX_ENTRIES = int(os.getenv("NEAR_DUP_MAX_ENTRIES", "10000"))
+
+FINGERPRINT_BITS = 64
+SHINGLE_WORDS = 3
+
+
+def normalize_text(text: str) -> str:
+    # Same normalization looks_like_resume() applies before keyword matching.
+    t = (text or "").lower()
+    return re.sub(r"\s+", " ", t).strip()
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> int:
+    words = normalize_text(text).split(" ")
+    if len(words) < SHINGLE_WORDS:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i : i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)]
+
+    hashes = [_hash64(s) for s in shingles]
+    half = len(hashes) / 2
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        ones = sum((h >> bit) & 1 for h in hashes)
+        if ones > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+@dataclass
+class NearDuplicate:
+    similarity: float
+    result: Dict[str, Any]
+
+
+class NearDuplicateIndex:
+    """
+    SimHash index over resume text, partitioned by `key`. The key must cover
+    everything else that feeds the prompt; /analyze uses the questionnaire
+    digest (role, timeline and answers), so changed answers never match.
+
+    Two fingerprints within `max_distance` differing bits must agree exactly on at
+    least one of `max_distance + 1` bit blocks (pigeonhole), so lookups only
+    compare against entries sharing a block instead of scanning the whole index.
+    """
+
+    def __init__(
+        self,
+        min_similarity: float = NEAR_DUP_SIMILARITY,
+        max_entries: int = NEAR_DUP_MAX_ENTRIES,
+    ):
+        self.min_similarity = min_similarity
+        self.max_entries = max_entries
+        self.max_distance = int((1.0 - min_similarity) * FINGERPRINT_BITS)
+
+        blocks = self.max_distance + 1
+        base, extra = divmod(FINGERPRINT_BITS, blocks)
+        self._blocks: List[Tuple[int, int]] = []
+        shift = 0
+        for i in range(blocks):
+            width = base + (1 if i < extra else 0)
+            self._blocks.append((shift, (1 << width) - 1))
+            shift += width
+
+        self._entries: "OrderedDict[int, Tuple[str, int, Dict[str, Any]]]" = OrderedDict()
+        self._tables: Dict[Tuple[str, int, int], List[int]] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _partition(key: str) -> str:
+        return normalize_text(key)
+
+    def _keys(self, partition: str, fingerprint: int):
+        for i, (shift, mask) in enumerate(self._blocks):
+            yield (partition, i, (fingerprint >> shift) & mask)
+
+    def find(self, key: str, text: str) -> Optional[NearDuplicate]:
+        return self.find_fingerprint(key, simhash(text))
+
+    def find_fingerprint(self, key: str, fingerprint: int) -> Optional[NearDuplicate]:
+        partition = self._partition(key)
+        best_id, best_distance = None, self.max_distance + 1
+        for table_key in self._keys(partition, fingerprint):
+            for entry_id in self._tables.get(table_key, ()):
+                distance = (self._entries[entry_id][1] ^ fingerprint).bit_count()
+                if distance < best_distance:
+                    best_id, best_distance = entry_id, distance
+
+        if best_id is None:
+            return None
+        return NearDuplicate(
+            similarity=1.0 - best_distance / FINGERPRINT_BITS,
+            result=self._entries[best_id][2],
+        )
+
+    def add(self, key: str, text: str, result: Dict[str, Any]) -> None:
+        self.add_fingerprint(key, simhash(text), result)
+
+    def add_fingerprint(self, key: str, fingerprint: int, result: Dict[str, Any]) -> None:
+        partition = self._partition(key)
+        entry_id = self._next_id
+        self._next_id += 1
+
+        self._entries[entry_id] = (partition, fingerprint, result)
+        for table_key in self._keys(partition, fingerprint):
+            self._tables.setdefault(table_key, []).append(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        entry_id, (partition, fingerprint, _) = self._entries.popitem(last=False)
+        for table_key in self._keys(partition, fingerprint):
+            bucket = self._tables.get(table_key)
+            if bucket is None:
+                continue
+            bucket.remove(entry_id)
+            if not bucket:
+                del self._tables[table_key]
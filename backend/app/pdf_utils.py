@@ -1,10 +1,95 @@
+import os
+import sys
+from dataclasses import dataclass
 from io import BytesIO
+from typing import BinaryIO, Optional, Tuple
+
 import pdfplumber
+from pdfminer.psexceptions import PSException
+from pdfplumber.utils.exceptions import MalformedPDFException, PdfminerException
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Per-extraction budget for resident memory growth while parsing (0 disables the check).
+# RSS is sampled between pages, so a single oversized page can overshoot it before the abort.
+PDF_MEMORY_BUDGET = int(os.getenv("PDF_MEMORY_BUDGET", str(256 * 1024 * 1024)))
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    pass
+
+
+class MalformedPdf(ValueError):
+    pass
+
+
+# What pdfplumber/pdfminer raise for files that pass the %PDF check but are broken inside.
+PDF_PARSE_ERRORS = (PdfminerException, MalformedPDFException, PSException)
+
+
+@dataclass
+class ExtractionStats:
+    pages: int
+    peak_bytes: int
+
+
+def current_rss() -> Optional[int]:
+    # /proc gives the current resident set; elsewhere fall back to the high-water
+    # mark, which still only grows when this extraction pushes memory up.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux but bytes on macOS.
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def extract_text_with_stats(
+    stream: BinaryIO,
+    memory_budget: Optional[int] = PDF_MEMORY_BUDGET,
+) -> Tuple[str, ExtractionStats]:
+    # RSS is process-wide, so growth is measured from what was resident when
+    # this extraction began. Reading it is a syscall per page, unlike tracing
+    # every allocation, so it is cheap enough to leave on.
+    baseline = current_rss()
+    track = baseline is not None
 
-def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
     text_parts = []
-    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-        for page in pdf.pages:
-            text_parts.append(page.extract_text() or "")
-    return "\n\n".join(text_parts).strip()
+    peak = 0
+    try:
+        with pdfplumber.open(stream) as pdf:
+            for page in pdf.pages:
+                text_parts.append(page.extract_text() or "")
+                # Drop this page's chars/layout objects now rather than when the
+                # document closes, so memory stays flat across long PDFs.
+                page.close()
+
+                if track:
+                    peak = max(peak, (current_rss() or 0) - baseline)
+                    if memory_budget and memory_budget > 0 and peak > memory_budget:
+                        raise MemoryBudgetExceeded(
+                            f"PDF extraction exceeded the {memory_budget} byte memory budget "
+                            f"after {len(text_parts)} page(s)."
+                        )
+    except PDF_PARSE_ERRORS as e:
+        raise MalformedPdf(f"PDF could not be parsed: {e}") from e
+
+    text = "\n\n".join(text_parts).strip()
+    return text, ExtractionStats(pages=len(text_parts), peak_bytes=peak)
+
+
+def extract_text_from_pdf_stream(stream: BinaryIO, memory_budget: Optional[int] = PDF_MEMORY_BUDGET) -> str:
+    text, _ = extract_text_with_stats(stream, memory_budget=memory_budget)
+    return text
+
+
+def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+    return extract_text_from_pdf_stream(BytesIO(pdf_bytes))
@@ -0,0 +1,107 @@
+import io
+import mmap
+import os
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Whole multipart body; /cohort/candidates sends several resumes in one request.
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(4 * MAX_UPLOAD_BYTES)))
+
+PDF_MAGIC = b"%PDF"
+# The PDF spec lets readers accept a few junk bytes before the header.
+PDF_MAGIC_WINDOW = 1024
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class NotAPdf(ValueError):
+    pass
+
+
+class UploadLimitMiddleware:
+    """
+    Caps request bodies before Starlette parses them into UploadFiles.
+
+    A declared Content-Length over the limit is refused without reading the
+    body; bodies without one (chunked) are counted as they arrive and the
+    request fails with 413 as soon as the count passes the limit.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int = MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        declared = Headers(scope=scope).get("content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            response = JSONResponse({"detail": self._detail()}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside the body read, so the route's exception handling turns it into a 413.
+                    raise HTTPException(status_code=413, detail=self._detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    def _detail(self) -> str:
+        return f"Request body exceeds the {self.max_bytes} byte limit."
+
+
+def _on_disk(file: BinaryIO) -> bool:
+    # SpooledTemporaryFile.fileno() forces a rollover to disk, so ask whether it already happened.
+    rolled = getattr(file, "_rolled", None)
+    if rolled is not None:
+        return bool(rolled)
+    try:
+        file.fileno()
+        return True
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return False
+
+
+@contextmanager
+def open_pdf_upload(file: BinaryIO, max_bytes: int = MAX_UPLOAD_BYTES) -> Iterator[BinaryIO]:
+    # Works on the file Starlette already spooled, so there is no second copy:
+    # the magic bytes and size are checked in place, and files Starlette rolled
+    # to disk are memory-mapped so the parser reads pages straight from them.
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    if size > max_bytes:
+        raise UploadTooLarge(f"File exceeds the {max_bytes} byte upload limit.")
+
+    file.seek(0)
+    if PDF_MAGIC not in file.read(PDF_MAGIC_WINDOW):
+        raise NotAPdf("File content is not a PDF.")
+    file.seek(0)
+
+    if not _on_disk(file):
+        yield file
+        return
+
+    mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mapped  # type: ignore[misc]
+    finally:
+        mapped.close()
@@ -0,0 +1,286 @@
+# batch_score.py (offline scoring of a directory of resume PDFs)
+#
+#   python batch_score.py --input ./resumes --role "Backend Engineer" --out results.jsonl
+#   python batch_score.py --input ./resumes --role "Data Analyst" --out results.parquet
+#
+# Results are appended to a JSONL file as they are produced; that file doubles as the
+# checkpoint, so re-running the same command skips PDFs that already have a record.
+# Each record carries --role/--timeline, and a resume with different ones is refused.
+# Parquet output is written from the JSONL once the run completes (needs pyarrow).
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.pdf_utils import extract_text_from_pdf_stream
+
+
+@dataclass
+class RunStats:
+    files: int = 0
+    scored: int = 0
+    rejected: int = 0
+    errors: int = 0
+    skipped: int = 0
+    parse_seconds: float = 0.0
+    generate_seconds: float = 0.0
+
+
+def parse_one(path: str) -> Tuple[str, Optional[str], Optional[str], float]:
+    # Runs in a worker process. Kept free of `main` imports so workers never load the model.
+    started = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            text = extract_text_from_pdf_stream(f)
+        return path, text, None, time.perf_counter() - started
+    except Exception as e:
+        return path, None, str(e), time.perf_counter() - started
+
+
+def find_pdfs(root: str) -> List[str]:
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.lower().endswith(".pdf"):
+                found.append(os.path.join(dirpath, name))
+    return sorted(found)
+
+
+OUTPUT_EXTENSIONS = (".jsonl", ".parquet")
+
+
+def output_path(value: str) -> str:
+    if not value.lower().endswith(OUTPUT_EXTENSIONS):
+        raise argparse.ArgumentTypeError(f"must end in {' or '.join(OUTPUT_EXTENSIONS)}: {value}")
+    return value
+
+
+def checkpoint_path(out: str) -> str:
+    return out if out.lower().endswith(".jsonl") else out + ".partial.jsonl"
+
+
+def load_done(path: str, role: str, timeline: Optional[str]) -> Set[str]:
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+
+    with open(path, "rb") as f:
+        data = f.read()
+    # An interrupted run can leave a torn last line. Cut it off so the next
+    # record starts on its own line; that PDF is simply redone.
+    complete = data.rfind(b"\n") + 1
+    if complete < len(data):
+        with open(path, "r+b") as f:
+            f.truncate(complete)
+
+    for line in data[:complete].decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+            done.add(record["path"])
+        except (json.JSONDecodeError, KeyError):
+            continue
+        # Records are only comparable under the same questionnaire; never mix runs.
+        if record.get("role") != role or record.get("timeline") != timeline:
+            raise SystemExit(
+                f"{path} was written with --role {record.get('role')!r} --timeline {record.get('timeline')!r}; "
+                f"use those, or a different --out for --role {role!r} --timeline {timeline!r}."
+            )
+    return done
+
+
+def chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def parquet_schema(pa: Any) -> Any:
+    return pa.schema(
+        [
+            ("path", pa.string()),
+            ("status", pa.string()),
+            ("role", pa.string()),
+            ("timeline", pa.string()),
+            ("result", pa.string()),
+            ("error", pa.string()),
+        ]
+    )
+
+
+def write_parquet(jsonl_path: str, out: str) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet output needs pyarrow (pip install pyarrow); results are in " + jsonl_path)
+
+    with open(jsonl_path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    # Nested results are stored as JSON strings, and every column is listed
+    # explicitly so ok and error rows share one schema whichever comes first.
+    rows = [
+        {
+            "path": r["path"],
+            "status": r["status"],
+            "role": r.get("role"),
+            "timeline": r.get("timeline"),
+            "result": json.dumps(r["result"]) if r.get("result") is not None else None,
+            "error": r.get("error"),
+        }
+        for r in records
+    ]
+    pq.write_table(pa.Table.from_pylist(rows, schema=parquet_schema(pa)), out)
+
+
+def score_batch(
+    backend: Any,
+    q: Any,
+    parsed: List[Tuple[str, Optional[str], Optional[str], float]],
+    batch_size: int,
+    stats: RunStats,
+    baseline_sample_rate: float = 0.0,
+) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = []
+    to_generate: List[Tuple[str, str]] = []
+
+    for path, text, error, parse_seconds in parsed:
+        stats.parse_seconds += parse_seconds
+        if error is not None:
+            stats.errors += 1
+            records.append({"path": path, "status": "error", "error": f"PDF extraction failed: {error}"})
+            continue
+
+        is_resume, hits, matched, reason = backend.looks_like_resume(text)
+        if not is_resume:
+            stats.rejected += 1
+            records.append(
+                {"path": path, "status": "rejected", "error": f"{reason} (hits={hits}, matched={matched})"}
+            )
+            continue
+
+        profile_text = backend.build_profile_text(mode="resume", q=q, resume_text=text)
+        to_generate.append((path, backend.build_prompt(profile_text)))
+
+    if to_generate:
+        started = time.perf_counter()
+        results = backend.run_ai_batch(
+            [p for _, p in to_generate],
+            batch_size=batch_size,
+            baseline_sample_rate=baseline_sample_rate,
+        )
+        stats.generate_seconds += time.perf_counter() - started
+
+        for (path, _), result in zip(to_generate, results):
+            if isinstance(result, Exception):
+                stats.errors += 1
+                records.append({"path": path, "status": "error", "error": f"AI output was not valid JSON. Error: {result}"})
+            else:
+                stats.scored += 1
+                records.append({"path": path, "status": "ok", "result": result.model_dump()})
+
+    return records
+
+
+def print_summary(stats: RunStats, elapsed: float) -> None:
+    processed = stats.scored + stats.rejected + stats.errors
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(
+        "\n".join(
+            [
+                "",
+                f"files found:       {stats.files}",
+                f"skipped (resumed): {stats.skipped}",
+                f"scored:            {stats.scored}",
+                f"rejected:          {stats.rejected}",
+                f"errors:            {stats.errors}",
+                f"elapsed:           {elapsed:.1f}s ({rate:.2f} files/s)",
+                f"parse time (sum):  {stats.parse_seconds:.1f}s",
+                f"generation time:   {stats.generate_seconds:.1f}s",
+            ]
+        )
+    )
+
+
+def print_cascade_estimate(report: Dict[str, Any]) -> None:
+    # Only meaningful with FULL_TIER_LATENCY_MS or --baseline-sample-rate; null otherwise.
+    for tier in report["tiers"]:
+        if "latencySavedMs" in tier:
+            saved = tier["latencySavedMs"]
+            estimate = f"{saved / 1000:.1f}s (estimate, {report['finalLatencyEstimateSource']})" if saved is not None else "n/a"
+            print(f"{tier['tier']} tier saved:   {estimate}")
+
+
+def run(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    stats = RunStats()
+
+    progress_path = checkpoint_path(args.out)
+    done = load_done(progress_path, args.role, args.timeline)
+    paths = find_pdfs(args.input)
+    stats.files = len(paths)
+    todo = [p for p in paths if p not in done]
+    stats.skipped = len(paths) - len(todo)
+
+    if todo:
+        # Imported here, not at module level: spawned parse workers re-import this
+        # module and must not pay for loading the generation model.
+        import main as backend
+
+        q = backend.normalize_questionnaire({"roleApplyingFor": args.role, "timeline": args.timeline})
+
+        # Parse the next window while the current one is generating.
+        window = args.batch_size * max(args.workers, 1) * 2
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=ctx) as pool, open(progress_path, "a") as out:
+            windows = list(chunks(todo, window))
+            pending = pool.map(parse_one, windows[0])
+            for i in range(len(windows)):
+                parsed = list(pending)
+                if i + 1 < len(windows):
+                    pending = pool.map(parse_one, windows[i + 1])
+
+                for batch in chunks(parsed, args.batch_size):
+                    records = score_batch(backend, q, batch, args.batch_size, stats, args.baseline_sample_rate)
+                    for record in records:
+                        record.update(role=args.role, timeline=args.timeline)
+                        out.write(json.dumps(record) + "\n")
+                    out.flush()
+
+                processed = stats.scored + stats.rejected + stats.errors
+                print(f"{processed}/{len(todo)} processed", file=sys.stderr)
+
+    if progress_path != args.out:
+        write_parquet(progress_path, args.out)
+
+    print_summary(stats, time.perf_counter() - started)
+    if todo:
+        print_cascade_estimate(backend.generation_report())
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Score a directory of resume PDFs offline.")
+    parser.add_argument("--input", required=True, help="Directory to search (recursively) for PDFs.")
+    parser.add_argument("--role", required=True, help="roleApplyingFor used for every resume.")
+    parser.add_argument("--timeline", default=None, choices=["< 1 month", "1-3 months", "3+ months"])
+    parser.add_argument("--out", required=True, type=output_path, help="Output file: .jsonl or .parquet.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="PDF parsing processes.")
+    parser.add_argument("--batch-size", type=int, default=8, help="Prompts per generation batch.")
+    parser.add_argument(
+        "--baseline-sample-rate",
+        type=float,
+        default=0.0,
+        help="Share of prompts also timed on the full tier to estimate the cascade's latency saved.",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    sys.exit(run(build_parser().parse_args()))
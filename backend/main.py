@@ -322,24 +322,41 @@ async def analyze(
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import re
-from io import BytesIO
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Union
 
-import pdfplumber
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import FastAPI, File, Form, Header, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field, ValidationError
 from transformers import pipeline
 
+from app.pdf_utils import (
+    PDF_MEMORY_BUDGET,
+    ExtractionStats,
+    MalformedPdf,
+    MemoryBudgetExceeded,
+    extract_text_with_stats,
+)
+from app.cascade import GenerationCascade, Tier
+from app.cohort_index import COHORT_INDEX_DIR, CohortIndex
+from app.documents import DocumentArtifacts, DocumentStore
+from app.embeddings import embed_texts
+from app.near_dup import NEAR_DUP_ENABLED, NearDuplicateIndex
+from app.uploads import NotAPdf, UploadLimitMiddleware, UploadTooLarge, open_pdf_upload
+
 
 # -----------------------------
 # App
 # -----------------------------
 app = FastAPI()
 
+# Bounds the body before Starlette spools it into UploadFiles (added first so CORS wraps its 413s).
+app.add_middleware(UploadLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -365,6 +382,40 @@ _gen.model.generation_config.do_sample = True
 _gen.model.generation_config.temperature = 0.7
 _gen.model.generation_config.top_p = 0.9
 
+# Batched generation (run_ai_batch) needs left padding on decoder-only models.
+_gen.tokenizer.padding_side = "left"
+
+# Cascade: a cheap greedy pass first, the sampled config above only when that fails.
+# FAST_MODEL_ID optionally swaps in a smaller model for the fast pass.
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "true").lower() == "true"
+FAST_MODEL_ID = os.getenv("FAST_MODEL_ID", "")
+FAST_MAX_NEW_TOKENS = int(os.getenv("FAST_MAX_NEW_TOKENS", "200"))
+# Per-prompt cost of the full tier for the latency-saved estimate. Requests never
+# pay for measuring it; only batch_score.py can opt into a sampled baseline.
+FULL_TIER_LATENCY_MS = os.getenv("FULL_TIER_LATENCY_MS", "")
+
+_fast_gen = None
+
+
+def get_fast_generator():
+    global _fast_gen
+    if _fast_gen is None:
+        if not FAST_MODEL_ID or FAST_MODEL_ID == GEN_MODEL_ID:
+            _fast_gen = _gen
+        else:
+            _fast_gen = pipeline("text-generation", model=FAST_MODEL_ID, return_full_text=False)
+            _fast_gen.tokenizer.padding_side = "left"
+    return _fast_gen
+
+# Near-identical resumes with the same questionnaire (role, timeline, answers) reuse the earlier assessment.
+_near_dups = NearDuplicateIndex()
+
+# Resume embeddings for cohort ranking; disabled unless COHORT_INDEX_DIR is set.
+_cohort = CohortIndex(COHORT_INDEX_DIR) if COHORT_INDEX_DIR else None
+
+# Per-document artifacts so follow-up requests can reference a documentId instead of re-uploading.
+_documents = DocumentStore()
+
 
 # -----------------------------
 # Schema
@@ -431,13 +482,32 @@ RESUME_KEYWORDS = [
     "responsibilities",
 ]
 
+# Upper bound for resume text extracted client-side (see lib/pdfText.ts).
+MAX_RESUME_TEXT_CHARS = 20000
 
-def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
-    text_parts: List[str] = []
-    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-        for page in pdf.pages:
-            text_parts.append(page.extract_text() or "")
-    return "\n\n".join(text_parts).strip()
+
+def check_pdf_upload(upload: UploadFile) -> None:
+    if not (upload.filename or "").lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only .pdf files are allowed.")
+    if "pdf" not in (upload.content_type or "").lower():
+        raise HTTPException(status_code=400, detail="File must be a PDF.")
+
+
+async def extract_text_from_upload(
+    upload: UploadFile,
+    memory_budget: Optional[int] = PDF_MEMORY_BUDGET,
+) -> tuple[str, ExtractionStats]:
+    try:
+        with open_pdf_upload(upload.file) as stream:
+            return extract_text_with_stats(stream, memory_budget=memory_budget)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except NotAPdf as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except MalformedPdf as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except MemoryBudgetExceeded as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
 
 def looks_like_resume(text: str, min_hits: int = 3) -> tuple[bool, int, List[str], str]:
@@ -469,6 +539,7 @@ def build_profile_text(
     mode: AssessmentMode,
     q: QuestionnaireInput,
     resume_text: Optional[str],
+    resume_block: Optional[str] = None,
 ) -> str:
     role_line = q.roleApplyingFor or "(not provided)"
     timeline_line = q.timeline or "(not provided)"
@@ -495,12 +566,26 @@ def build_profile_text(
         f"ANSWERS:\n{qa_block}\n"
     )
 
-    if mode == "resume" and resume_text:
-        base += "\nRESUME TEXT:\n" + resume_text[:12000]
+    if mode == "resume":
+        if resume_block is None and resume_text:
+            resume_block = build_resume_block(resume_text)
+        if resume_block:
+            base += resume_block
 
     return base
 
 
+def build_resume_block(resume_text: str) -> str:
+    return "\nRESUME TEXT:\n" + resume_text[:12000]
+
+
+def questionnaire_digest(q: QuestionnaireInput) -> str:
+    # Everything build_profile_text takes from the questionnaire, exactly as the prompt
+    # shows it (roleApplyingFor is already stripped), so equal digests mean equal prompts.
+    payload = q.model_dump(exclude={"role", "selfIntro"})
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
 def build_prompt(profile_text: str) -> str:
     return (
         "You are an interviewer and evaluator.\n"
@@ -536,12 +621,78 @@ def extract_json_object(text: str) -> Dict[str, Any]:
     return json.loads(text[start : end + 1])
 
 
-def run_ai(prompt: str) -> AssessmentResult:
-    generated = _gen(prompt)[0]["generated_text"]
-    obj = extract_json_object(generated)
+def parse_assessment(text: str) -> AssessmentResult:
+    obj = extract_json_object(text)
     return AssessmentResult.model_validate(obj)
 
 
+# Score range each readiness level may plausibly come with (bands overlap on purpose).
+READINESS_SCORE_BANDS = {
+    "Beginner": (0, 45),
+    "Emerging": (25, 70),
+    "Almost Ready": (50, 90),
+    "Interview-Ready": (70, 100),
+}
+
+
+def looks_confident(result: AssessmentResult) -> bool:
+    # Cheap consistency checks on a fast-tier answer; failing any of them escalates.
+    d = result.dimensions
+    dims_avg = (d.technical + d.resume + d.communication + d.portfolio) / 4
+    if abs(result.overallScore - dims_avg) > 25:
+        return False
+
+    low, high = READINESS_SCORE_BANDS[result.readinessLevel]
+    if not low <= result.overallScore <= high:
+        return False
+
+    return bool(result.strengths and result.gaps and result.nextSteps and result.timelineSummary.strip())
+
+
+def _generate_fast(prompts: List[str], batch_size: int) -> List[str]:
+    outputs = get_fast_generator()(
+        prompts,
+        batch_size=batch_size,
+        do_sample=False,
+        max_new_tokens=FAST_MAX_NEW_TOKENS,
+    )
+    return [out[0]["generated_text"] for out in outputs]
+
+
+def _generate_full(prompts: List[str], batch_size: int) -> List[str]:
+    outputs = _gen(prompts, batch_size=batch_size)
+    return [out[0]["generated_text"] for out in outputs]
+
+
+_cascade = GenerationCascade(
+    tiers=(
+        [Tier("fast", _generate_fast), Tier("full", _generate_full)]
+        if CASCADE_ENABLED
+        else [Tier("full", _generate_full)]
+    ),
+    parse=parse_assessment,
+    accept=looks_confident,
+    final_seconds_estimate=float(FULL_TIER_LATENCY_MS) / 1000 if FULL_TIER_LATENCY_MS else None,
+)
+
+
+def run_ai(prompt: str) -> AssessmentResult:
+    return _cascade.run(prompt)
+
+
+def run_ai_batch(
+    prompts: List[str],
+    batch_size: int = 8,
+    baseline_sample_rate: float = 0.0,
+) -> List[Union[AssessmentResult, Exception]]:
+    # Per-prompt failures are returned in place so one bad output doesn't sink the batch.
+    return _cascade.run_batch(prompts, batch_size=batch_size, baseline_sample_rate=baseline_sample_rate)
+
+
+def generation_report() -> Dict[str, Any]:
+    return {"cascadeEnabled": CASCADE_ENABLED, **_cascade.report()}
+
+
 # -----------------------------
 # Routes
 # -----------------------------
@@ -550,12 +701,18 @@ async def health():
     return {"ok": True, "model": GEN_MODEL_ID}
 
 
+@app.get("/stats/generation")
+async def generation_stats():
+    return generation_report()
+
+
 @app.post("/parse-pdf")
 async def parse_pdf(file: UploadFile = File(...)):
     try:
-        content = await file.read()
-        text = extract_text_from_pdf_bytes(content)
-        return JSONResponse({"text": text})
+        text, stats = await extract_text_from_upload(file)
+        return JSONResponse({"text": text, "pages": stats.pages, "peakMemoryBytes": stats.peak_bytes})
+    except HTTPException:
+        raise
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
@@ -565,6 +722,9 @@ async def analyze(
     mode: str = Form(...),
     questionnaire: str = Form(...),
     resume: Optional[UploadFile] = File(None),
+    resumeText: Optional[str] = Form(None),
+    documentId: Optional[str] = Form(None),
+    x_document_id: Optional[str] = Header(None),
 ):
     if mode not in ("resume", "questions"):
         raise HTTPException(status_code=400, detail="Invalid mode. Use 'resume' or 'questions'.")
@@ -579,25 +739,47 @@ async def analyze(
         raise HTTPException(status_code=400, detail="Missing: roleApplyingFor.")
 
     resume_text: Optional[str] = None
-
-    if mode == "resume":
-        if resume is None:
+    doc: Optional[DocumentArtifacts] = None
+    # The Next.js proxy sends the id as a header, after routing on it (see app/api/analyze/route.ts).
+    documentId = documentId or x_document_id
+
+    if mode == "resume" and documentId:
+        # Follow-up on an earlier upload: extraction, guard and resume block are reused as-is.
+        doc = _documents.get(documentId)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired documentId.")
+        resume_text = doc.text
+
+    elif mode == "resume":
+        if resume is not None:
+            check_pdf_upload(resume)
+            resume_text, _ = await extract_text_from_upload(resume)
+        elif resumeText is not None:
+            # Text already extracted in the browser; the file never leaves the client.
+            if len(resumeText) > MAX_RESUME_TEXT_CHARS:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"resumeText exceeds {MAX_RESUME_TEXT_CHARS} characters.",
+                )
+            resume_text = resumeText.strip()
+        else:
             raise HTTPException(status_code=400, detail="Missing resume file.")
-        if not (resume.filename or "").lower().endswith(".pdf"):
-            raise HTTPException(status_code=400, detail="Only .pdf files are allowed.")
-        if "pdf" not in (resume.content_type or "").lower():
-            raise HTTPException(status_code=400, detail="File must be a PDF.")
 
-        pdf_bytes = await resume.read()
-        resume_text = extract_text_from_pdf_bytes(pdf_bytes)
-
-        is_resume, hits, matched, reason = looks_like_resume(resume_text)
+        guard = looks_like_resume(resume_text)
+        is_resume, hits, matched, reason = guard
         if not is_resume:
             raise HTTPException(
                 status_code=422,
                 detail=f"PDF rejected: not detected as a resume. {reason} (hits={hits}, matched={matched})",
             )
 
+        resume_block = build_resume_block(resume_text)
+        doc = _documents.put(
+            text=resume_text,
+            guard=guard,
+            resume_block=resume_block,
+        )
+
     if mode == "questions":
         required = [
             ("q1_intro", q.q1_intro),
@@ -609,15 +791,149 @@ async def analyze(
         if missing:
             raise HTTPException(status_code=400, detail=f"Missing required answers: {missing}")
 
-    profile_text = build_profile_text(mode=mode, q=q, resume_text=resume_text)
+    digest = questionnaire_digest(q)
+    headers = {"X-Document-Id": doc.id} if doc is not None else {}
+
+    # Same document, same answers: nothing changed, so nothing is recomputed.
+    if doc is not None and digest in doc.results:
+        return JSONResponse(doc.results[digest], headers=headers)
+
+    # Near-duplicates only count when the answers match too, since they feed the prompt.
+    use_near_dups = NEAR_DUP_ENABLED and mode == "resume" and bool(resume_text)
+    if use_near_dups:
+        match = _near_dups.find(digest, resume_text)
+        if match:
+            return JSONResponse(
+                match.result,
+                headers={**headers, "X-Near-Duplicate-Similarity": f"{match.similarity:.3f}"},
+            )
+
+    profile_text = build_profile_text(
+        mode=mode,
+        q=q,
+        resume_text=resume_text,
+        resume_block=doc.resume_block if doc is not None else None,
+    )
     prompt = build_prompt(profile_text)
 
     try:
         assessment = run_ai(prompt)
     except Exception as e:
+        # The document is already stored, so a retry can send the id instead of re-uploading.
         raise HTTPException(
             status_code=422,
             detail=f"AI output was not valid JSON. Error: {str(e)}",
+            headers=headers,
         )
 
-    return JSONResponse(assessment.model_dump())
+    result = assessment.model_dump()
+    if use_near_dups:
+        _near_dups.add(digest, resume_text, result)
+    if doc is not None:
+        doc.results[digest] = result
+
+    return JSONResponse(result, headers=headers)
+
+
+@app.get("/documents/{document_id}")
+async def get_document(document_id: str):
+    doc = _documents.get(document_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired documentId.")
+
+    is_resume, hits, matched, reason = doc.guard
+    return JSONResponse(
+        {
+            "documentId": doc.id,
+            "textLength": len(doc.text),
+            "guard": {"isResume": is_resume, "hits": hits, "matched": matched, "reason": reason},
+            "sections": {name: len(body) for name, body in doc.sections.items()},
+            "cachedResults": len(doc.results),
+        }
+    )
+
+
+def require_cohort() -> CohortIndex:
+    if _cohort is None:
+        raise HTTPException(status_code=404, detail="Cohort index is disabled. Set COHORT_INDEX_DIR.")
+    return _cohort
+
+
+@app.post("/cohort/roles")
+async def cohort_set_role(
+    roleApplyingFor: str = Form(...),
+    description: str = Form(...),
+):
+    cohort = require_cohort()
+    cohort.set_role(roleApplyingFor, description, embed_texts([description])[0])
+    return JSONResponse({"ok": True, "role": cohort.role_key(roleApplyingFor)})
+
+
+@app.post("/cohort/candidates")
+async def cohort_add_candidates(
+    roleApplyingFor: str = Form(...),
+    resumes: List[UploadFile] = File(...),
+):
+    cohort = require_cohort()
+
+    names: List[str] = []
+    texts: List[str] = []
+    rejected: List[Dict[str, str]] = []
+    for upload in resumes:
+        name = upload.filename or "resume"
+        # One bad file is reported in `rejected` instead of failing the whole batch.
+        try:
+            check_pdf_upload(upload)
+            text, _ = await extract_text_from_upload(upload)
+        except HTTPException as e:
+            rejected.append({"name": name, "reason": str(e.detail)})
+            continue
+        except Exception as e:
+            rejected.append({"name": name, "reason": f"PDF extraction failed: {e}"})
+            continue
+
+        is_resume, _, _, reason = looks_like_resume(text)
+        if not is_resume:
+            rejected.append({"name": name, "reason": reason})
+            continue
+        names.append(name)
+        texts.append(text)
+
+    # One batched embedding pass for the whole upload.
+    ids = cohort.add(names, [roleApplyingFor] * len(names), texts, embed_texts(texts)) if texts else []
+    return JSONResponse(
+        {
+            "added": [{"id": i, "name": n} for i, n in zip(ids, names)],
+            "rejected": rejected,
+        }
+    )
+
+
+@app.post("/cohort/rank")
+async def cohort_rank(
+    roleApplyingFor: str = Form(...),
+    k: int = Form(10),
+    assessTop: int = Form(0),
+):
+    cohort = require_cohort()
+
+    # Fall back to embedding the role title when no description was stored.
+    query = cohort.role_vector(roleApplyingFor)
+    if query is None:
+        query = embed_texts([roleApplyingFor])[0]
+    ranked = cohort.rank_cohort(roleApplyingFor, k, query=query)
+
+    q = normalize_questionnaire({"roleApplyingFor": roleApplyingFor})
+    out: List[Dict[str, Any]] = []
+    for position, (candidate, score) in enumerate(ranked):
+        entry: Dict[str, Any] = {"id": candidate.id, "name": candidate.name, "score": score}
+        # Only the best matches go through generation.
+        if position < assessTop:
+            prompt = build_prompt(build_profile_text(mode="resume", q=q, resume_text=candidate.text))
+            try:
+                entry["assessment"] = run_ai(prompt).model_dump()
+            except Exception as e:
+                entry["error"] = f"AI output was not valid JSON. Error: {str(e)}"
+        out.append(entry)
+
+    return JSONResponse({"role": cohort.role_key(roleApplyingFor), "candidates": out})
@@ -0,0 +1,72 @@
+import json
+import os
+
+import numpy as np
+
+from app.cohort_index import CohortIndex
+
+
+def unit_vectors(n: int, dim: int = 4) -> np.ndarray:
+    return np.eye(n, dim, dtype=np.float32)
+
+
+def test_add_dedupes_same_text_per_role(tmp_path):
+    index = CohortIndex(str(tmp_path))
+    ids = index.add(
+        ["a.pdf", "b.pdf", "a-again.pdf"],
+        ["Backend Engineer"] * 3,
+        ["Python  Django", "Go services", "python django"],
+        unit_vectors(3),
+    )
+
+    assert ids[0] == ids[2]
+    assert len(index) == 2
+    assert os.path.getsize(tmp_path / "vectors.f32") == 2 * 4 * 4
+
+    # Same text under another role is a separate candidate.
+    other = index.add(["a.pdf"], ["Data Analyst"], ["Python Django"], unit_vectors(1))
+    assert other[0] != ids[0]
+    assert len(CohortIndex(str(tmp_path))) == 3
+
+
+def test_torn_candidate_line_is_dropped_on_load(tmp_path):
+    index = CohortIndex(str(tmp_path))
+    index.add(["a.pdf"], ["Backend Engineer"], ["first resume"], unit_vectors(1))
+    with open(tmp_path / "candidates.jsonl", "a") as f:
+        f.write('{"id": "torn')
+
+    reloaded = CohortIndex(str(tmp_path))
+    assert len(reloaded) == 1
+    assert (tmp_path / "candidates.jsonl").read_text().endswith("\n")
+
+    reloaded.add(["b.pdf"], ["Backend Engineer"], ["second resume"], unit_vectors(2)[1:])
+    with open(tmp_path / "candidates.jsonl") as f:
+        names = [json.loads(line)["name"] for line in f]
+    assert names == ["a.pdf", "b.pdf"]
+
+
+def test_extra_vector_rows_are_truncated_on_load(tmp_path):
+    vectors = unit_vectors(3)
+    index = CohortIndex(str(tmp_path))
+    index.add(["a.pdf", "b.pdf"], ["Backend Engineer"] * 2, ["resume a", "resume b"], vectors[:2])
+    # Crash between the vector append and the metadata append.
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(vectors[2].tobytes())
+
+    reloaded = CohortIndex(str(tmp_path))
+    assert os.path.getsize(tmp_path / "vectors.f32") == 2 * 4 * 4
+
+    reloaded.add(["c.pdf"], ["Backend Engineer"], ["resume c"], vectors[2:])
+    top = reloaded.rank_cohort("Backend Engineer", 1, query=vectors[2])
+    assert top[0][0].name == "c.pdf"
+    assert top[0][1] == 1.0
+
+
+def test_role_and_info_files_are_replaced_whole(tmp_path):
+    index = CohortIndex(str(tmp_path))
+    index.set_role("Backend Engineer", "APIs and databases", unit_vectors(1)[0])
+
+    assert json.loads((tmp_path / "index.json").read_text()) == {"dim": 4}
+    assert list(json.loads((tmp_path / "roles.json").read_text())) == ["backend engineer"]
+    assert not [p for p in os.listdir(tmp_path) if p.startswith(".tmp-")]
+    np.testing.assert_allclose(CohortIndex(str(tmp_path)).role_vector("backend engineer"), unit_vectors(1)[0])
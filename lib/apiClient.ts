@@ -1,5 +1,10 @@
 // lib/apiClient.ts
 import { AssessmentResult, AssessmentMode, QuestionnaireInput } from './scoringSchemas';
+import { extractPdfText } from './pdfText';
+import { looksLikeResume } from './resumeGuard';
+
+// Opt-in: extract resume text in the browser and send only the text to the backend.
+const CLIENT_PDF_EXTRACTION = process.env.NEXT_PUBLIC_CLIENT_PDF_EXTRACTION === 'true';
 
 interface AnalyzeProfileArgs {
   mode: AssessmentMode;
@@ -7,20 +12,78 @@ interface AnalyzeProfileArgs {
   questionnaire: QuestionnaireInput;
 }
 
+// Returns null when the browser could not get any text out of the PDF,
+// in which case the file is uploaded and the server parses it instead.
+async function extractResumeTextLocally(resumeFile: File): Promise<string | null> {
+  let text: string;
+  try {
+    text = await extractPdfText(resumeFile);
+  } catch (err) {
+    console.warn('Client-side PDF extraction failed, falling back to server parsing.', err);
+    return null;
+  }
+  if (!text) return null;
+
+  const check = looksLikeResume(text);
+  if (!check.isResume) {
+    throw new Error(
+      `PDF rejected: not detected as a resume. ${check.reason} (hits=${check.hits}, matched=${check.matched.join(', ')})`
+    );
+  }
+  return text;
+}
+
+// Backend document ids for files already analyzed, so resubmitting the same file
+// with tweaked answers skips the upload and re-extraction.
+const documentIds = new WeakMap<File, string>();
+
+async function postAnalyze(formData: FormData, documentId?: string): Promise<Response> {
+  return fetch('/api/analyze', {
+    method: 'POST',
+    body: formData,
+    // Sent as a header so the proxy can route to the backend that issued the id without parsing the body.
+    headers: documentId ? { 'X-Document-Id': documentId } : undefined,
+  });
+}
+
 export async function analyzeProfile({
   mode,
   resumeFile,
   questionnaire,
 }: AnalyzeProfileArgs): Promise<AssessmentResult> {
-  const formData = new FormData();
-  formData.append('mode', mode);
-  formData.append('questionnaire', JSON.stringify(questionnaire));
-  if (resumeFile) formData.append('resume', resumeFile);
+  const baseForm = () => {
+    const formData = new FormData();
+    formData.append('mode', mode);
+    formData.append('questionnaire', JSON.stringify(questionnaire));
+    return formData;
+  };
 
-  const res = await fetch('/api/analyze', {
-    method: 'POST',
-    body: formData,
-  });
+  let res: Response | null = null;
+
+  const documentId = resumeFile && mode === 'resume' ? documentIds.get(resumeFile) : undefined;
+  if (documentId) {
+    res = await postAnalyze(baseForm(), documentId);
+    // The backend forgets documents after a while (or was restarted, or is down).
+    if (res.status === 404) {
+      documentIds.delete(resumeFile!);
+      res = null;
+    }
+  }
+
+  if (!res) {
+    const formData = baseForm();
+    if (resumeFile) {
+      const resumeText =
+        CLIENT_PDF_EXTRACTION && mode === 'resume' ? await extractResumeTextLocally(resumeFile) : null;
+      if (resumeText) formData.append('resumeText', resumeText);
+      else formData.append('resume', resumeFile);
+    }
+    res = await postAnalyze(formData);
+  }
+
+  // Kept even when generation failed, so retrying the same file skips the upload.
+  const newDocumentId = res.headers.get('x-document-id');
+  if (resumeFile && newDocumentId) documentIds.set(resumeFile, newDocumentId);
 
   if (!res.ok) {
     const text = await res.text().catch(() => '');
@@ -0,0 +1,32 @@
+// lib/pdfText.ts
+// Browser-side PDF text extraction. pdf.js parses in its own web worker, so the UI stays responsive.
+
+// Matches the slice the backend puts into the prompt, plus headroom for the guard.
+export const MAX_RESUME_TEXT_CHARS = 20000;
+
+export async function extractPdfText(file: File): Promise<string> {
+  const pdfjs = await import('pdfjs-dist');
+  pdfjs.GlobalWorkerOptions.workerSrc = new URL('pdfjs-dist/build/pdf.worker.min.mjs', import.meta.url).toString();
+
+  const doc = await pdfjs.getDocument({ data: await file.arrayBuffer() }).promise;
+  const pages: string[] = [];
+  let length = 0;
+
+  try {
+    for (let i = 1; i <= doc.numPages && length < MAX_RESUME_TEXT_CHARS; i++) {
+      const page = await doc.getPage(i);
+      const content = await page.getTextContent();
+      const text = content.items
+        .map((item) => ('str' in item ? item.str + (item.hasEOL ? '\n' : ' ') : ''))
+        .join('');
+      page.cleanup();
+
+      pages.push(text);
+      length += text.length;
+    }
+  } finally {
+    await doc.destroy();
+  }
+
+  return pages.join('\n\n').trim().slice(0, MAX_RESUME_TEXT_CHARS);
+}
@@ -0,0 +1,41 @@
+// lib/resumeGuard.ts
+// Browser copy of looks_like_resume() in backend/main.py. Keep the keyword list in sync.
+
+const RESUME_KEYWORDS = [
+  'professional summary',
+  'experience',
+  'work experience',
+  'education',
+  'skills',
+  'projects',
+  'internship',
+  'certification',
+  'summary',
+  'objective',
+  'linkedin',
+  'github',
+  'achievements',
+  'responsibilities',
+];
+
+export interface ResumeCheck {
+  isResume: boolean;
+  hits: number;
+  matched: string[];
+  reason: string;
+}
+
+export function looksLikeResume(text: string, minHits = 3): ResumeCheck {
+  const t = (text || '').toLowerCase().replace(/\s+/g, ' ').trim();
+
+  const matched = RESUME_KEYWORDS.filter((k) => t.includes(k));
+  const hits = matched.length;
+
+  if (t.length < 400) {
+    return { isResume: false, hits, matched, reason: 'Text is too short to be a resume.' };
+  }
+  if (hits < minHits) {
+    return { isResume: false, hits, matched, reason: `Not enough resume keywords (need ${minHits}).` };
+  }
+  return { isResume: true, hits, matched, reason: 'Looks like a resume.' };
+}